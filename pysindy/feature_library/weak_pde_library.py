@@ -504,6 +504,11 @@ class WeakPDELibrary(BaseFeatureLibrary):
                 ret * np.product(H_xt_k[k] ** (1.0 - deriv))
             ]
 
+        # Product weights for time derivatives, stacked like inds_flat
+        self.fulltweights_flat = np.concatenate(
+            [self.fulltweights[k].ravel() for k in range(self.K)]
+        )
+
         # Product weights over the axes for pure derivative terms, shaped as inds_k
         self.fullweights0 = []
         for k in range(self.K):
@@ -521,6 +526,11 @@ class WeakPDELibrary(BaseFeatureLibrary):
 
             self.fullweights0 = self.fullweights0 + [ret * np.product(H_xt_k[k])]
 
+        # Product weights for pure derivative terms, stacked like inds_flat
+        self.fullweights0_flat = np.concatenate(
+            [self.fullweights0[k].ravel() for k in range(self.K)]
+        )
+
         # Product weights over the axes for mixed derivative terms, shaped as inds_k
         self.fullweights1 = []
         for k in range(self.K):
@@ -546,6 +556,26 @@ class WeakPDELibrary(BaseFeatureLibrary):
                 weights2 = weights2 + [ret * np.product(H_xt_k[k] ** (1.0 - deriv))]
             self.fullweights1 = self.fullweights1 + [weights2]
 
+        # Product weights for each derivative term, stacked like inds_flat
+        self.fullweights1_flat = [
+            np.concatenate([self.fullweights1[k][j].ravel() for k in range(self.K)])
+            for j in range(self.num_derivatives)
+        ]
+
+        # Flattened grid indices of the points in each domain cell, stacked
+        # over all domain cells, with the offset at which each cell starts.
+        # Together with the stacked weights above, this lets the integrals over
+        # all domain cells be evaluated with a single gather and reduction.
+        self.inds_flat = np.concatenate(
+            [
+                np.ravel_multi_index(np.ix_(*self.inds_k[k]), self.grid_dims).ravel()
+                for k in range(self.K)
+            ]
+        )
+        self.cell_starts = np.concatenate(
+            [[0], np.cumsum(np.prod(shapes_k, axis=1))[:-1]]
+        )
+
     @staticmethod
     def _combinations(n_features, n_args, interaction_only):
         """
@@ -670,28 +700,21 @@ class WeakPDELibrary(BaseFeatureLibrary):
         Takes a full set of spatiotemporal fields u(x, t) and finds the weak
         form of u_dot.
         """
-        K = self.K
-        gdim = self.grid_ndim
-        u_dot_integral = np.zeros((K, u.shape[-1]))
-        deriv_orders = np.zeros(gdim)
-        deriv_orders[-1] = 1
-
-        # Extract the input features on indices in each domain cell
-        dims = np.array(self.spatiotemporal_grid.shape)
-        dims[-1] = u.shape[-1]
-
-        for k in range(self.K):  # loop over domain cells
-            # calculate the integral feature by taking the dot product
-            # of the weights and functions over each axis
-            u_dot_integral[k] = np.tensordot(
-                self.fulltweights[k],
-                -u[np.ix_(*self.inds_k[k])],
-                axes=(
-                    tuple(np.arange(self.grid_ndim)),
-                    tuple(np.arange(self.grid_ndim)),
-                ),
+        if u.shape[:-1] != self.grid_dims:
+            raise ValueError(
+                f"Input grid dimensions {u.shape[:-1]} do not match the "
+                f"spatiotemporal_grid dimensions {self.grid_dims}."
             )
 
+        # Gather the input features on the points of all domain cells at once
+        u_k = np.reshape(u, (-1, u.shape[-1]))[self.inds_flat]
+
+        # calculate the integral feature of every domain cell by summing
+        # the weighted functions over the points of each cell
+        u_dot_integral = -np.add.reduceat(
+            self.fulltweights_flat[:, np.newaxis] * u_k, self.cell_starts, axis=0
+        )
+
         return u_dot_integral
 
     def get_feature_names(self, input_features=None):
@@ -847,12 +870,14 @@ class WeakPDELibrary(BaseFeatureLibrary):
 
         xp_full = []
         for x in x_full:
+            if x.shape[:-1] != self.grid_dims:
+                raise ValueError(
+                    f"Input grid dimensions {x.shape[:-1]} do not match the "
+                    f"spatiotemporal_grid dimensions {self.grid_dims}."
+                )
             n_features = x.shape[x.ax_coord]
             xp = np.empty((self.K, self.n_output_features_), dtype=x.dtype)
 
-            # Extract the input features on indices in each domain cell
-            self.x_k = [x[np.ix_(*self.inds_k[k])] for k in range(self.K)]
-
             # library function terms
             n_library_terms = 0
             for f in self.functions:
@@ -860,8 +885,6 @@ class WeakPDELibrary(BaseFeatureLibrary):
                     n_features, f.__code__.co_argcount, self.interaction_only
                 ):
                     n_library_terms += 1
-            library_functions = np.empty((self.K, n_library_terms), dtype=x.dtype)
-
             # Evaluate the functions on the indices of domain cells
             funcs = np.zeros((*x.shape[:-1], n_library_terms))
             func_idx = 0
@@ -873,17 +896,16 @@ class WeakPDELibrary(BaseFeatureLibrary):
                     func_idx += 1
 
             # library function terms
-            for k in range(self.K):  # loop over domain cells
-                # calculate the integral feature by taking the dot product
-                # of the weights and functions over each axis
-                library_functions[k] = np.tensordot(
-                    self.fullweights0[k],
-                    funcs[np.ix_(*self.inds_k[k])],
-                    axes=(
-                        tuple(np.arange(self.grid_ndim)),
-                        tuple(np.arange(self.grid_ndim)),
-                    ),
-                )
+            # calculate the integral feature of every domain cell by summing
+            # the weighted functions over the points of each cell
+            funcs_k = np.reshape(funcs, (np.prod(x.shape[:-1]), n_library_terms))[
+                self.inds_flat
+            ]
+            library_functions = np.add.reduceat(
+                self.fullweights0_flat[:, np.newaxis] * funcs_k,
+                self.cell_starts,
+                axis=0,
+            )
 
             if self.derivative_order != 0:
                 # pure integral terms
@@ -891,23 +913,22 @@ class WeakPDELibrary(BaseFeatureLibrary):
                     (self.K, n_features * self.num_derivatives), dtype=x.dtype
                 )
 
-                for k in range(self.K):  # loop over domain cells
-                    library_idx = 0
-                    for j in range(self.num_derivatives):  # loop over derivatives
-                        # Calculate the integral feature by taking the dot product
-                        # of the weights and data x_k over each axis.
-                        # Integration by parts gives power of (-1).
-                        library_integrals[k, library_idx : library_idx + n_features] = (
-                            -1
-                        ) ** (np.sum(self.multiindices[j])) * np.tensordot(
-                            self.fullweights1[k][j],
-                            self.x_k[k],
-                            axes=(
-                                tuple(np.arange(self.grid_ndim)),
-                                tuple(np.arange(self.grid_ndim)),
-                            ),
-                        )
-                        library_idx += n_features
+                # Extract the input features on the points of all domain cells
+                x_k = np.reshape(x, (np.prod(x.shape[:-1]), n_features))[self.inds_flat]
+
+                library_idx = 0
+                for j in range(self.num_derivatives):  # loop over derivatives
+                    # Calculate the integral feature of every domain cell by
+                    # summing the weighted data x_k over the points of each cell.
+                    # Integration by parts gives power of (-1).
+                    library_integrals[:, library_idx : library_idx + n_features] = (
+                        -1
+                    ) ** (np.sum(self.multiindices[j])) * np.add.reduceat(
+                        self.fullweights1_flat[j][:, np.newaxis] * x_k,
+                        self.cell_starts,
+                        axis=0,
+                    )
+                    library_idx += n_features
 
                 # Mixed derivative/non-derivative terms
                 if self.include_interaction:
@@ -979,54 +1000,53 @@ class WeakPDELibrary(BaseFeatureLibrary):
 
                     # Calculate the mixed integrals
                     library_idx = 0
+                    # Derivative orders for mixed derivatives product rule
+                    derivs = np.concatenate(
+                        [
+                            [np.zeros(self.ind_range, dtype=int)],
+                            self.multiindices,
+                        ],
+                        axis=0,
+                    )
                     for j in range(self.num_derivatives):
                         integral = np.zeros((self.K, n_library_terms, n_features))
                         # Derivative orders after integration by parts
                         derivs_mixed = self.multiindices[j] // 2
                         derivs_pure = self.multiindices[j] - derivs_mixed
-                        # Derivative orders for mixed derivatives product rule
-                        derivs = np.concatenate(
-                            [
-                                [np.zeros(self.ind_range, dtype=int)],
-                                self.multiindices,
-                            ],
-                            axis=0,
-                        )
                         # Sum the terms in product rule
                         for deriv in derivs[
                             np.where(np.all(derivs <= derivs_mixed, axis=1))[0]
                         ]:
+                            # Weights are either in fullweights0 or fullweights1
+                            j0 = np.where(np.all(derivs == deriv, axis=1))[0][0]
+                            # indices for product rule terms
+                            j1 = np.where(
+                                np.all(derivs == derivs_mixed - deriv, axis=1)
+                            )[0][0]
+                            j2 = np.where(np.all(derivs == derivs_pure, axis=1))[0][0]
+                            # Integration by parts gives power of (-1).
+                            # Binomial factor comes by product rule.
+                            factor = (-1) ** (np.sum(derivs_mixed)) * np.prod(
+                                binom(derivs_mixed, deriv)
+                            )
                             for k in range(self.K):
-                                # Weights are either in fullweights0 or fullweights1
-                                j0 = np.where(np.all(derivs == deriv, axis=1))[0][0]
                                 if j0 == 0:
                                     weights = self.fullweights0[k]
                                 else:
                                     weights = self.fullweights1[k][j0 - 1]
 
-                                # indices for product rule terms
-                                j1 = np.where(
-                                    np.all(derivs == derivs_mixed - deriv, axis=1)
-                                )[0][0]
-                                j2 = np.where(np.all(derivs == derivs_pure, axis=1))[0][
-                                    0
-                                ]
                                 # Calculate the integral by taking the dot product
-                                # of the weights and data x_k over each axis.
-                                # Integration by parts gives power of (-1).
-                                # Binomial factor comes by product rule.
-                                integral[k] = integral[k] + (-1) ** (
-                                    np.sum(derivs_mixed)
-                                ) * np.tensordot(
-                                    weights,
-                                    self.dfx_k_j[k][j1][..., np.newaxis]
-                                    * self.dx_k_j[k][j2][..., np.newaxis, :],
-                                    axes=(
-                                        tuple(np.arange(self.grid_ndim)),
-                                        tuple(np.arange(self.grid_ndim)),
-                                    ),
-                                ) * np.product(
-                                    binom(derivs_mixed, deriv)
+                                # of the weighted function derivatives and the
+                                # data derivatives over the points of the cell,
+                                # without forming their full outer product.
+                                dfx = self.dfx_k_j[k][j1]
+                                dx = self.dx_k_j[k][j2]
+                                integral[k] = integral[k] + factor * np.dot(
+                                    np.reshape(
+                                        weights[..., np.newaxis] * dfx,
+                                        (weights.size, dfx.shape[-1]),
+                                    ).T,
+                                    np.reshape(dx, (weights.size, dx.shape[-1])),
                                 )
                         # collect the results
                         for n in range(n_features):
@@ -1039,9 +1059,9 @@ class WeakPDELibrary(BaseFeatureLibrary):
             library_idx = 0
             # Constant term
             if self.include_bias:
-                constants_final = np.zeros(self.K)
-                for k in range(self.K):
-                    constants_final[k] = np.sum(self.fullweights0[k])
+                constants_final = np.add.reduceat(
+                    self.fullweights0_flat, self.cell_starts
+                )
                 xp[:, library_idx] = constants_final
                 library_idx += 1
 
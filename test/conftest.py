@@ -6,6 +6,9 @@ from pathlib import Path
 import numpy as np
 import pytest
 from scipy.integrate import solve_ivp
+from scipy.sparse import coo_matrix
+from scipy.sparse import csc_matrix
+from scipy.sparse import csr_matrix
 
 from pysindy.differentiation import FiniteDifference
 from pysindy.differentiation import SpectralDerivative
@@ -58,16 +61,29 @@ def data_1d_bad_shape():
     return x, t
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def data_lorenz():
 
     t = np.linspace(0, 5, 500)
     x0 = [8, 27, -7]
     x = solve_ivp(lorenz, (t[0], t[-1]), x0, t_eval=t).y.T
+    x.flags.writeable = False
+    t.flags.writeable = False
 
     return x, t
 
 
+@pytest.fixture(scope="session")
+def data_lorenz_sparse(data_lorenz):
+    x, t = data_lorenz
+    sparse_x = {}
+    for sparse_format in [csc_matrix, csr_matrix, coo_matrix]:
+        sparse_x[sparse_format] = sparse_format(x)
+        sparse_x[sparse_format].data.flags.writeable = False
+
+    return sparse_x
+
+
 @pytest.fixture
 def data_multiple_trajctories():
 
@@ -169,8 +185,7 @@ def data_2d_random_pde():
     dt = t[1] - t[0]
     x = np.linspace(0, 10, n)
     y = np.linspace(0, 10, n)
-    X, Y = np.meshgrid(x, y)
-    spatial_grid = np.asarray([X, Y]).T
+    spatial_grid = np.stack(np.meshgrid(x, y, indexing="ij"), axis=-1)
     u = np.random.randn(n, n, n, 2)
     u_dot = FiniteDifference(axis=2)._differentiate(u, t=dt)
     return spatial_grid, u, u_dot
@@ -184,13 +199,7 @@ def data_3d_random_pde():
     x = np.linspace(0, 10, n)
     y = np.linspace(0, 10, n)
     z = np.linspace(0, 10, n)
-    (
-        X,
-        Y,
-        Z,
-    ) = np.meshgrid(x, y, z, indexing="ij")
-    spatial_grid = np.asarray([X, Y, Z])
-    spatial_grid = np.transpose(spatial_grid, axes=[1, 2, 3, 0])
+    spatial_grid = np.stack(np.meshgrid(x, y, z, indexing="ij"), axis=-1)
     u = np.random.randn(n, n, n, n, 2)
     u_dot = FiniteDifference(axis=3)._differentiate(u, t=dt)
     return spatial_grid, u, u_dot
@@ -206,14 +215,65 @@ def data_5d_random_pde():
     x = np.linspace(0, 10, n)
     y = np.linspace(0, 10, n)
     z = np.linspace(0, 10, n)
-    V, W, X, Y, Z = np.meshgrid(v, w, x, y, z, indexing="ij")
-    spatial_grid = np.asarray([V, W, X, Y, Z])
-    spatial_grid = np.transpose(spatial_grid, axes=[1, 2, 3, 4, 5, 0])
+    spatial_grid = np.stack(np.meshgrid(v, w, x, y, z, indexing="ij"), axis=-1)
     u = np.random.randn(n, n, n, n, n, n, 2)
     u_dot = FiniteDifference(axis=5)._differentiate(u, t=dt)
     return spatial_grid, u, u_dot
 
 
+@pytest.fixture(scope="session")
+def data_1d_random_weak_pde():
+    n = 10
+    t = np.linspace(0, 10, n)
+    x = np.linspace(0, 10, n)
+    spatiotemporal_grid = np.stack(np.meshgrid(x, t, indexing="ij"), axis=-1)
+    u = np.random.default_rng(0).standard_normal((n, n, 1))
+    u.flags.writeable = False
+    return spatiotemporal_grid, u
+
+
+@pytest.fixture(scope="session")
+def data_2d_random_weak_pde():
+    n = 10
+    t = np.linspace(0, 10, n)
+    x = np.linspace(0, 10, n)
+    y = np.linspace(0, 10, n)
+    spatiotemporal_grid = np.stack(np.meshgrid(x, y, t, indexing="ij"), axis=-1)
+    u = np.random.default_rng(0).standard_normal((n, n, n, 1))
+    u.flags.writeable = False
+    return spatiotemporal_grid, u
+
+
+@pytest.fixture(scope="session")
+def data_3d_random_weak_pde():
+    n = 10
+    t = np.linspace(0, 10, n)
+    x = np.linspace(0, 10, n)
+    y = np.linspace(0, 10, n)
+    z = np.linspace(0, 10, n)
+    spatiotemporal_grid = np.stack(np.meshgrid(x, y, z, t, indexing="ij"), axis=-1)
+    u = np.random.default_rng(0).standard_normal((n, n, n, n, 2))
+    u.flags.writeable = False
+    return spatiotemporal_grid, u
+
+
+@pytest.fixture(scope="session")
+def data_5d_random_weak_pde():
+    n = 5
+    t = np.linspace(0, 10, n)
+    v = np.linspace(0, 10, n)
+    w = np.linspace(0, 10, n)
+    x = np.linspace(0, 10, n)
+    y = np.linspace(0, 10, n)
+    z = np.linspace(0, 10, n)
+    spatiotemporal_grid = np.stack(
+        np.meshgrid(v, w, x, y, z, t, indexing="ij"), axis=-1
+    )
+    u = np.random.default_rng(0).standard_normal((n, n, n, n, n, n, 2))
+    u.flags.writeable = False
+    return spatiotemporal_grid, u
+
+
 @pytest.fixture
 def data_2d_resolved_pde():
     n = 8
@@ -222,8 +282,7 @@ def data_2d_resolved_pde():
     dt = t[1] - t[0]
     x = np.linspace(0, 10, n)
     y = np.linspace(0, 10, n)
-    X, Y = np.meshgrid(x, y)
-    spatial_grid = np.asarray([X, Y]).T
+    spatial_grid = np.stack(np.meshgrid(x, y, indexing="ij"), axis=-1)
     u = np.random.randn(n, n, nt, 2)
     u_dot = FiniteDifference(axis=-2)._differentiate(u, t=dt)
     return spatial_grid, u, u_dot
@@ -289,9 +348,9 @@ def data_custom_library():
     ]
     function_names = [
         lambda s: str(s),
-        lambda s: str(s) + "^2",
+        lambda s: f"{s}^2",
         lambda s: "0",
-        lambda s, t: str(s) + " " + str(t),
+        lambda s, t: f"{s} {t}",
     ]
 
     return CustomLibrary(
@@ -309,9 +368,9 @@ def data_custom_library_bias():
     ]
     function_names = [
         lambda s: str(s),
-        lambda s: str(s) + "^2",
+        lambda s: f"{s}^2",
         lambda s: "0",
-        lambda s, t: str(s) + " " + str(t),
+        lambda s, t: f"{s} {t}",
     ]
 
     return CustomLibrary(
@@ -330,8 +389,8 @@ def data_quadratic_library():
     ]
     function_names = [
         lambda x: str(x),
-        lambda x, y: "{} * {}".format(x, y),
-        lambda x: "{}^2".format(x),
+        lambda x, y: f"{x} * {y}",
+        lambda x: f"{x}^2",
     ]
     return CustomLibrary(
         library_functions=library_functions, function_names=function_names
@@ -359,8 +418,8 @@ def data_sindypi_library():
     ]
     function_names = [
         lambda s: str(s),
-        lambda s: str(s) + "^2",
-        lambda s, t: str(s) + " " + str(t),
+        lambda s: f"{s}^2",
+        lambda s, t: f"{s} {t}",
     ]
     t = np.linspace(0, 5, 500)
 
@@ -382,8 +441,8 @@ def data_ode_library():
     ]
     function_names = [
         lambda s: str(s),
-        lambda s: str(s) + "^2",
-        lambda s, t: str(s) + " " + str(t),
+        lambda s: f"{s}^2",
+        lambda s, t: f"{s} {t}",
     ]
 
     return PDELibrary(
@@ -402,8 +461,8 @@ def data_pde_library():
     ]
     function_names = [
         lambda s: str(s),
-        lambda s: str(s) + "^2",
-        lambda s, t: str(s) + " " + str(t),
+        lambda s: f"{s}^2",
+        lambda s, t: f"{s} {t}",
     ]
 
     return PDELibrary(
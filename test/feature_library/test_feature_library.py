@@ -27,13 +27,22 @@ from pysindy.optimizers import SINDyPI
 from pysindy.optimizers import STLSQ
 
 
+# Library functions and names shared by the library construction tests
+LIBRARY_FUNCTIONS = (lambda x: x, lambda x: x**2, lambda x: 0 * x)
+LIBRARY_FUNCTION_NAMES = (lambda s: str(s), lambda s: f"{s}^2", lambda s: "0")
+
+
+@pytest.fixture
+def library(request):
+    """Library to test, given directly or as the name of a fixture."""
+    if isinstance(request.param, str):
+        return request.getfixturevalue(request.param)
+    return request.param
+
+
 def test_form_custom_library():
-    library_functions = [lambda x: x, lambda x: x**2, lambda x: 0 * x]
-    function_names = [
-        lambda s: str(s),
-        lambda s: "{}^2".format(s),
-        lambda s: "0",
-    ]
+    library_functions = list(LIBRARY_FUNCTIONS)
+    function_names = list(LIBRARY_FUNCTION_NAMES)
 
     # Test with user-supplied function names
     CustomLibrary(library_functions=library_functions, function_names=function_names)
@@ -43,12 +52,8 @@ def test_form_custom_library():
 
 
 def test_form_pde_library():
-    library_functions = [lambda x: x, lambda x: x**2, lambda x: 0 * x]
-    function_names = [
-        lambda s: str(s),
-        lambda s: "{}^2".format(s),
-        lambda s: "0",
-    ]
+    library_functions = list(LIBRARY_FUNCTIONS)
+    function_names = list(LIBRARY_FUNCTION_NAMES)
 
     # Test with user-supplied function names
     PDELibrary(library_functions=library_functions, function_names=function_names)
@@ -58,12 +63,8 @@ def test_form_pde_library():
 
 
 def test_form_sindy_pi_library():
-    library_functions = [lambda x: x, lambda x: x**2, lambda x: 0 * x]
-    function_names = [
-        lambda s: str(s),
-        lambda s: "{}^2".format(s),
-        lambda s: "0",
-    ]
+    library_functions = list(LIBRARY_FUNCTIONS)
+    function_names = list(LIBRARY_FUNCTION_NAMES)
     # Test with user-supplied function names
     SINDyPILibrary(library_functions=library_functions, function_names=function_names)
 
@@ -87,27 +88,34 @@ def test_bad_parameters():
     with pytest.raises(ValueError):
         FourierLibrary(include_sin=False, include_cos=False)
     with pytest.raises(ValueError):
-        library_functions = [lambda x: x, lambda x: x**2, lambda x: 0 * x]
-        function_names = [lambda s: str(s), lambda s: "{}^2".format(s)]
+        library_functions = list(LIBRARY_FUNCTIONS)
+        function_names = list(LIBRARY_FUNCTION_NAMES[:2])
         CustomLibrary(
             library_functions=library_functions, function_names=function_names
         )
 
 
+# Array-valued parameters are given as factories so that the arrays are only
+# built when the corresponding test case runs, not at collection time
+def _build_params(params):
+    return {key: val() if callable(val) else val for key, val in params.items()}
+
+
 @pytest.mark.parametrize(
     "params",
     [
-        dict(function_names=[lambda s: str(s), lambda s: "{}^2".format(s)]),
+        dict(function_names=list(LIBRARY_FUNCTION_NAMES[:2])),
         dict(derivative_order=1),
         dict(derivative_order=3),
         dict(spatial_grid=range(10)),
         dict(spatial_grid=range(10), derivative_order=-1),
-        dict(spatial_grid=np.zeros((10, 10))),
-        dict(spatial_grid=np.zeros((10, 10, 10, 10, 10))),
+        dict(spatial_grid=lambda: np.zeros((3, 3))),
+        dict(spatial_grid=lambda: np.zeros((3, 3, 3, 3, 3))),
     ],
 )
 def test_pde_library_bad_parameters(params):
-    params["library_functions"] = [lambda x: x, lambda x: x**2, lambda x: 0 * x]
+    params = _build_params(params)
+    params["library_functions"] = list(LIBRARY_FUNCTIONS)
     with pytest.raises(ValueError):
         PDELibrary(**params)
 
@@ -121,27 +129,28 @@ def test_pde_library_bad_parameters(params):
         dict(spatiotemporal_grid=range(10), K=-1),
         dict(),
         dict(
-            spatiotemporal_grid=np.asarray(np.meshgrid(range(10), range(10))).T,
+            spatiotemporal_grid=lambda: np.stack(
+                np.meshgrid(range(3), range(3), indexing="ij"), axis=-1
+            ),
             H_xt=-1,
         ),
         dict(
-            spatiotemporal_grid=np.transpose(
-                np.asarray(np.meshgrid(range(10), range(10), range(10), indexing="ij")),
-                axes=[1, 2, 3, 0],
+            spatiotemporal_grid=lambda: np.stack(
+                np.meshgrid(range(3), range(3), range(3), indexing="ij"), axis=-1
             ),
             H_xt=-1,
         ),
         dict(
-            spatiotemporal_grid=np.transpose(
-                np.asarray(np.meshgrid(range(10), range(10), range(10), indexing="ij")),
-                axes=[1, 2, 3, 0],
+            spatiotemporal_grid=lambda: np.stack(
+                np.meshgrid(range(3), range(3), range(3), indexing="ij"), axis=-1
             ),
             H_xt=11,
         ),
     ],
 )
 def test_weak_pde_library_bad_parameters(params):
-    params["library_functions"] = [lambda x: x, lambda x: x**2, lambda x: 0 * x]
+    params = _build_params(params)
+    params["library_functions"] = list(LIBRARY_FUNCTIONS)
     with pytest.raises(ValueError):
         WeakPDELibrary(**params)
 
@@ -216,14 +225,14 @@ def test_parametrized_library_bad_parameters(data_lorenz, params):
     "params",
     [
         dict(
-            library_functions=[lambda x: x, lambda x: x**2, lambda x: 0 * x],
-            function_names=[lambda s: str(s), lambda s: "{}^2".format(s)],
+            library_functions=list(LIBRARY_FUNCTIONS),
+            function_names=list(LIBRARY_FUNCTION_NAMES[:2]),
         ),
         dict(
-            x_dot_library_functions=[lambda x: x, lambda x: x**2, lambda x: 0 * x],
-            function_names=[lambda s: str(s), lambda s: "{}^2".format(s)],
+            x_dot_library_functions=list(LIBRARY_FUNCTIONS),
+            function_names=list(LIBRARY_FUNCTION_NAMES[:2]),
         ),
-        dict(x_dot_library_functions=[lambda x: x, lambda x: x**2, lambda x: 0 * x]),
+        dict(x_dot_library_functions=list(LIBRARY_FUNCTIONS)),
         dict(),
         dict(
             library_functions=[lambda x: x, lambda x: x**2],
@@ -245,12 +254,13 @@ def test_sindypi_library_bad_params(params):
         PolynomialLibrary(include_bias=False),
         FourierLibrary(),
         IdentityLibrary() + PolynomialLibrary(),
-        pytest.lazy_fixture("data_custom_library"),
-        pytest.lazy_fixture("data_custom_library_bias"),
-        pytest.lazy_fixture("data_generalized_library"),
-        pytest.lazy_fixture("data_ode_library"),
-        pytest.lazy_fixture("data_sindypi_library"),
+        "data_custom_library",
+        "data_custom_library_bias",
+        "data_generalized_library",
+        "data_ode_library",
+        "data_sindypi_library",
     ],
+    indirect=True,
 )
 def test_fit_transform(data_lorenz, library):
     x, t = data_lorenz
@@ -266,13 +276,14 @@ def test_fit_transform(data_lorenz, library):
         PolynomialLibrary(include_bias=False),
         FourierLibrary(),
         IdentityLibrary() + PolynomialLibrary(),
-        pytest.lazy_fixture("data_custom_library"),
-        pytest.lazy_fixture("data_custom_library_bias"),
-        pytest.lazy_fixture("data_generalized_library"),
-        pytest.lazy_fixture("data_ode_library"),
-        pytest.lazy_fixture("data_pde_library"),
-        pytest.lazy_fixture("data_sindypi_library"),
+        "data_custom_library",
+        "data_custom_library_bias",
+        "data_generalized_library",
+        "data_ode_library",
+        "data_pde_library",
+        "data_sindypi_library",
     ],
+    indirect=True,
 )
 def test_change_in_data_shape(data_lorenz, library):
     x, t = data_lorenz
@@ -289,12 +300,13 @@ def test_change_in_data_shape(data_lorenz, library):
         (PolynomialLibrary(), 10),
         (IdentityLibrary() + PolynomialLibrary(), 13),
         (FourierLibrary(), 6),
-        (pytest.lazy_fixture("data_custom_library_bias"), 13),
-        (pytest.lazy_fixture("data_custom_library"), 12),
-        (pytest.lazy_fixture("data_generalized_library"), 76),
-        (pytest.lazy_fixture("data_ode_library"), 9),
-        (pytest.lazy_fixture("data_sindypi_library"), 39),
+        ("data_custom_library_bias", 13),
+        ("data_custom_library", 12),
+        ("data_generalized_library", 76),
+        ("data_ode_library", 9),
+        ("data_sindypi_library", 39),
     ],
+    indirect=["library"],
 )
 def test_output_shape(data_lorenz, library, shape):
     x, t = data_lorenz
@@ -312,12 +324,13 @@ def test_output_shape(data_lorenz, library, shape):
         PolynomialLibrary(include_bias=False),
         FourierLibrary(),
         PolynomialLibrary() + FourierLibrary(),
-        pytest.lazy_fixture("data_custom_library"),
-        pytest.lazy_fixture("data_custom_library_bias"),
-        pytest.lazy_fixture("data_generalized_library"),
-        pytest.lazy_fixture("data_ode_library"),
-        pytest.lazy_fixture("data_sindypi_library"),
+        "data_custom_library",
+        "data_custom_library_bias",
+        "data_generalized_library",
+        "data_ode_library",
+        "data_sindypi_library",
     ],
+    indirect=True,
 )
 def test_get_feature_names(data_lorenz, library):
     with pytest.raises(NotFittedError):
@@ -335,12 +348,20 @@ def test_get_feature_names(data_lorenz, library):
     assert isinstance(feature_names[0], str)
 
 
-@pytest.mark.parametrize("sparse_format", [csc_matrix, csr_matrix, coo_matrix])
-def test_polynomial_sparse_inputs(data_lorenz, sparse_format):
-    x, t = data_lorenz
+def test_polynomial_csr_inputs(data_lorenz_sparse):
+    library = PolynomialLibrary()
+    library.fit_transform(data_lorenz_sparse[csr_matrix])
+    check_is_fitted(library)
+
+
+# CSC and COO inputs are converted to CSR for the expansion
+@pytest.mark.parametrize("sparse_format", [csc_matrix, coo_matrix])
+def test_polynomial_sparse_conversion(data_lorenz_sparse, sparse_format):
     library = PolynomialLibrary()
-    library.fit_transform(sparse_format(x))
+    xp = library.fit_transform(data_lorenz_sparse[sparse_format])
     check_is_fitted(library)
+    expected = library.transform(data_lorenz_sparse[csr_matrix])
+    np.testing.assert_allclose(xp.toarray(), expected.toarray())
 
 
 # Catch-all for various combinations of options and
@@ -351,14 +372,17 @@ def test_polynomial_sparse_inputs(data_lorenz, sparse_format):
         ({"degree": 4}, csr_matrix),
         ({"include_bias": True}, csr_matrix),
         ({"include_bias": False}, csr_matrix),
-        ({"include_interaction": False}, lambda x: x),
-        ({"include_interaction": False, "include_bias": True}, lambda x: x),
+        ({"include_interaction": False}, None),
+        ({"include_interaction": False, "include_bias": True}, None),
     ],
 )
-def test_polynomial_options(data_lorenz, kwargs, sparse_format):
+def test_polynomial_options(data_lorenz, data_lorenz_sparse, kwargs, sparse_format):
     x, t = data_lorenz
+    # sparse_format None means the dense input is used
+    if sparse_format is not None:
+        x = data_lorenz_sparse[sparse_format]
     library = PolynomialLibrary(**kwargs)
-    library.fit_transform(sparse_format(x))
+    library.fit_transform(x)
     check_is_fitted(library)
 
 
@@ -417,12 +441,13 @@ def test_tensored(data_lorenz):
         PolynomialLibrary(),
         FourierLibrary(),
         PolynomialLibrary() + FourierLibrary(),
-        pytest.lazy_fixture("data_custom_library"),
-        pytest.lazy_fixture("data_generalized_library"),
-        pytest.lazy_fixture("data_ode_library"),
-        pytest.lazy_fixture("data_pde_library"),
-        pytest.lazy_fixture("data_sindypi_library"),
+        "data_custom_library",
+        "data_generalized_library",
+        "data_ode_library",
+        "data_pde_library",
+        "data_sindypi_library",
     ],
+    indirect=True,
 )
 def test_not_fitted(data_lorenz, library):
     x, t = data_lorenz
@@ -438,12 +463,13 @@ def test_not_fitted(data_lorenz, library):
         PolynomialLibrary(),
         FourierLibrary(),
         PolynomialLibrary() + FourierLibrary(),
-        pytest.lazy_fixture("data_custom_library"),
-        pytest.lazy_fixture("data_generalized_library"),
-        pytest.lazy_fixture("data_ode_library"),
-        pytest.lazy_fixture("data_pde_library"),
-        pytest.lazy_fixture("data_sindypi_library"),
+        "data_custom_library",
+        "data_generalized_library",
+        "data_ode_library",
+        "data_pde_library",
+        "data_sindypi_library",
     ],
+    indirect=True,
 )
 def test_library_ensemble(data_lorenz, library):
     x, t = data_lorenz
@@ -603,8 +629,7 @@ def test_generalized_library_weak_pde(data_1d_random_pde):
     t, x, u, u_dot = data_1d_random_pde
     library_functions = [lambda x: x, lambda x: x * x]
     library_function_names = [lambda x: x, lambda x: x + x]
-    X, T = np.meshgrid(x, t)
-    XT = np.array([X, T]).T
+    XT = np.stack(np.meshgrid(x, t, indexing="ij"), axis=-1)
     weak_library1 = WeakPDELibrary(
         library_functions=library_functions,
         function_names=library_function_names,
@@ -667,8 +692,7 @@ def test_parameterized_library(diffuse_multiple_trajectories):
         num_parameters=1,
     )
 
-    X, T = np.meshgrid(spatial_grid, t, indexing="ij")
-    XT = np.transpose([X, T], [1, 2, 0])
+    XT = np.stack(np.meshgrid(spatial_grid, t, indexing="ij"), axis=-1)
 
     np.random.seed(100)
     weak_feature_lib = WeakPDELibrary(
@@ -785,16 +809,10 @@ def test_5D_pdes(data_5d_random_pde):
     pde_library_helper(pde_lib, u, 2)
 
 
-def test_1D_weak_pdes():
-    n = 10
-    t = np.linspace(0, 10, n)
-    x = np.linspace(0, 10, n)
-    u = np.random.randn(n, n, 1)
+def test_1D_weak_pdes(data_1d_random_weak_pde):
+    spatiotemporal_grid, u = data_1d_random_weak_pde
     library_functions = [lambda x: x, lambda x: x * x]
     library_function_names = [lambda x: x, lambda x: x + x]
-    X, T = np.meshgrid(x, t, indexing="ij")
-    spatiotemporal_grid = np.asarray([X, T])
-    spatiotemporal_grid = np.transpose(spatiotemporal_grid, axes=[1, 2, 0])
     pde_lib = WeakPDELibrary(
         library_functions=library_functions,
         function_names=library_function_names,
@@ -806,15 +824,35 @@ def test_1D_weak_pdes():
     pde_library_helper(pde_lib, u, 1)
 
 
-def test_2D_weak_pdes():
-    n = 10
-    t = np.linspace(0, 10, n)
-    x = np.linspace(0, 10, n)
-    y = np.linspace(0, 10, n)
-    X, Y, T = np.meshgrid(x, y, t, indexing="ij")
-    spatiotemporal_grid = np.asarray([X, Y, T])
-    spatiotemporal_grid = np.transpose(spatiotemporal_grid, axes=[1, 2, 3, 0])
-    u = np.random.randn(n, n, n, 1)
+def test_weak_pdes_without_library_functions(data_1d_random_weak_pde):
+    spatiotemporal_grid, u = data_1d_random_weak_pde
+    pde_lib = WeakPDELibrary(
+        derivative_order=2,
+        spatiotemporal_grid=spatiotemporal_grid,
+        H_xt=2,
+        include_bias=True,
+    )
+    pde_library_helper(pde_lib, u, 1)
+
+
+def test_weak_pde_library_grid_mismatch(data_2d_random_weak_pde):
+    spatiotemporal_grid, u = data_2d_random_weak_pde
+    pde_lib = WeakPDELibrary(
+        library_functions=list(LIBRARY_FUNCTIONS),
+        function_names=list(LIBRARY_FUNCTION_NAMES),
+        derivative_order=2,
+        spatiotemporal_grid=spatiotemporal_grid,
+        H_xt=2,
+    ).fit(u)
+    u_mismatched = np.concatenate([u, u[:, :3]], axis=1)
+    with pytest.raises(ValueError):
+        pde_lib.transform(u_mismatched)
+    with pytest.raises(ValueError):
+        pde_lib.convert_u_dot_integral(u_mismatched)
+
+
+def test_2D_weak_pdes(data_2d_random_weak_pde):
+    spatiotemporal_grid, u = data_2d_random_weak_pde
     library_functions = [lambda x: x, lambda x: x * x]
     library_function_names = [lambda x: x, lambda x: x + x]
     pde_lib = WeakPDELibrary(
@@ -829,16 +867,8 @@ def test_2D_weak_pdes():
     pde_library_helper(pde_lib, u, 1)
 
 
-def test_3D_weak_pdes():
-    n = 10
-    t = np.linspace(0, 10, n)
-    x = np.linspace(0, 10, n)
-    y = np.linspace(0, 10, n)
-    z = np.linspace(0, 10, n)
-    X, Y, Z, T = np.meshgrid(x, y, z, t, indexing="ij")
-    spatiotemporal_grid = np.asarray([X, Y, Z, T])
-    spatiotemporal_grid = np.transpose(spatiotemporal_grid, axes=[1, 2, 3, 4, 0])
-    u = np.random.randn(n, n, n, n, 2)
+def test_3D_weak_pdes(data_3d_random_weak_pde):
+    spatiotemporal_grid, u = data_3d_random_weak_pde
     library_functions = [lambda x: x, lambda x: x * x]
     library_function_names = [lambda x: x, lambda x: x + x]
     pde_lib = WeakPDELibrary(
@@ -853,18 +883,8 @@ def test_3D_weak_pdes():
     pde_library_helper(pde_lib, u, 2)
 
 
-def test_5D_weak_pdes():
-    n = 5
-    t = np.linspace(0, 10, n)
-    v = np.linspace(0, 10, n)
-    w = np.linspace(0, 10, n)
-    x = np.linspace(0, 10, n)
-    y = np.linspace(0, 10, n)
-    z = np.linspace(0, 10, n)
-    V, W, X, Y, Z, T = np.meshgrid(v, w, x, y, z, t, indexing="ij")
-    spatiotemporal_grid = np.asarray([V, W, X, Y, Z, T])
-    spatiotemporal_grid = np.transpose(spatiotemporal_grid, axes=[1, 2, 3, 4, 5, 6, 0])
-    u = np.random.randn(n, n, n, n, n, n, 2)
+def test_5D_weak_pdes(data_5d_random_weak_pde):
+    spatiotemporal_grid, u = data_5d_random_weak_pde
     library_functions = [lambda x: x, lambda x: x * x]
     library_function_names = [lambda x: x, lambda x: x + x]
     pde_lib = WeakPDELibrary(
@@ -879,7 +899,8 @@ def test_5D_weak_pdes():
     pde_library_helper(pde_lib, u, 2)
 
 
-def test_sindypi_library(data_lorenz):
+@pytest.fixture
+def sindypi_library_lorenz(data_lorenz):
     x, t = data_lorenz
     x_library_functions = [
         lambda x: x,
@@ -894,29 +915,36 @@ def test_sindypi_library(data_lorenz):
         lambda x: x + x,
         lambda x: x,
     ]
-    sindy_library = SINDyPILibrary(
+    return SINDyPILibrary(
         library_functions=x_library_functions,
         x_dot_library_functions=x_dot_library_functions,
         t=t,
         function_names=library_function_names,
         include_bias=True,
     )
+
+
+def test_sindypi_library(data_lorenz, sindypi_library_lorenz):
+    x, t = data_lorenz
     sindy_opt = SINDyPI(threshold=0.1, thresholder="l1")
     model = SINDy(
         optimizer=sindy_opt,
-        feature_library=sindy_library,
+        feature_library=sindypi_library_lorenz,
         differentiation_method=FiniteDifference(drop_endpoints=True),
     )
     model.fit(x, t=t)
     assert np.shape(sindy_opt.coef_) == (40, 40)
 
+
+def test_sindypi_library_model_subset(data_lorenz, sindypi_library_lorenz):
+    x, t = data_lorenz
     sindy_opt = SINDyPI(threshold=1, thresholder="l1", model_subset=[3])
     model = SINDy(
         optimizer=sindy_opt,
-        feature_library=sindy_library,
+        feature_library=sindypi_library_lorenz,
         differentiation_method=FiniteDifference(drop_endpoints=True),
     )
     model.fit(x, t=t)
-    assert np.sum(sindy_opt.coef_ == 0.0) == 40.0 * 39.0 and np.any(
+    assert np.count_nonzero(sindy_opt.coef_) == 40 and np.any(
         sindy_opt.coef_[3, :] != 0.0
     )
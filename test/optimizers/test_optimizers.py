@@ -356,8 +356,8 @@ def test_sr3_quadratic_library(params):
     ]
     library_function_names = [
         lambda x: str(x),
-        lambda x, y: "{} * {}".format(x, y),
-        lambda x: "{}^2".format(x),
+        lambda x, y: f"{x} * {y}",
+        lambda x: f"{x}^2",
     ]
     sindy_library = CustomLibrary(
         library_functions=library_functions, function_names=library_function_names
@@ -392,8 +392,8 @@ def test_constrained_sr3_quadratic_library(params):
     ]
     library_function_names = [
         lambda x: str(x),
-        lambda x, y: "{} * {}".format(x, y),
-        lambda x: "{}^2".format(x),
+        lambda x, y: f"{x} * {y}",
+        lambda x: f"{x}^2",
     ]
     sindy_library = CustomLibrary(
         library_functions=library_functions, function_names=library_function_names
@@ -546,11 +546,11 @@ def test_trapping_cubic_library():
     ]
     library_function_names = [
         lambda x: str(x),
-        lambda x, y: "{} * {}".format(x, y),
-        lambda x: "{}^2".format(x),
-        lambda x, y, z: "{} * {} * {}".format(x, y, z),
-        lambda x, y: "{}^2 * {}".format(x, y),
-        lambda x: "{}^3".format(x),
+        lambda x, y: f"{x} * {y}",
+        lambda x: f"{x}^2",
+        lambda x, y, z: f"{x} * {y} * {z}",
+        lambda x, y: f"{x}^2 * {y}",
+        lambda x: f"{x}^3",
     ]
     sindy_library = CustomLibrary(
         library_functions=library_functions, function_names=library_function_names
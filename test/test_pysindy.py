@@ -126,6 +126,7 @@ def test_mixed_inputs(data):
 )
 def test_bad_t(data):
     x, t = data
+    t = t.copy()
     model = SINDy()
 
     # Wrong type
@@ -324,8 +325,7 @@ def test_score_pde(data_1d_random_pde):
 
     assert model.score(u, t, x_dot=u) <= 1
 
-    X, T = np.meshgrid(x, t)
-    XT = np.array([X, T]).T
+    XT = np.stack(np.meshgrid(x, t, indexing="ij"), axis=-1)
     weak_lib = WeakPDELibrary(
         library_functions=library_functions,
         function_names=library_function_names,
@@ -719,8 +719,7 @@ def test_ensemble_weak_pdes(data_1d_random_pde):
     t, x, u, u_dot = data_1d_random_pde
     library_functions = [lambda x: x, lambda x: x * x]
     library_function_names = [lambda x: x, lambda x: x + x]
-    X, T = np.meshgrid(x, t)
-    XT = np.array([X, T]).T
+    XT = np.stack(np.meshgrid(x, t, indexing="ij"), axis=-1)
     weak_lib = WeakPDELibrary(
         library_functions=library_functions,
         function_names=library_function_names,
@@ -772,8 +771,7 @@ def test_library_ensemble_weak_pde(data_1d_random_pde):
     t, x, u, u_dot = data_1d_random_pde
     library_functions = [lambda x: x, lambda x: x * x]
     library_function_names = [lambda x: x, lambda x: x + x]
-    X, T = np.meshgrid(x, t)
-    XT = np.array([X, T]).T
+    XT = np.stack(np.meshgrid(x, t, indexing="ij"), axis=-1)
     weak_lib = WeakPDELibrary(
         library_functions=library_functions,
         function_names=library_function_names,
@@ -826,8 +824,7 @@ def test_both_ensemble_weak_pde(data_1d_random_pde):
     t, x, u, u_dot = data_1d_random_pde
     library_functions = [lambda x: x, lambda x: x * x]
     library_function_names = [lambda x: x, lambda x: x + x]
-    X, T = np.meshgrid(x, t)
-    XT = np.array([X, T]).T
+    XT = np.stack(np.meshgrid(x, t, indexing="ij"), axis=-1)
     weak_lib = WeakPDELibrary(
         library_functions=library_functions,
         function_names=library_function_names,
@@ -905,8 +902,7 @@ def test_multiple_trajectories_and_ensemble(diffuse_multiple_trajectories):
         spatial_grid=x,
     )
 
-    X, T = np.meshgrid(x, t, indexing="ij")
-    XT = np.transpose([X, T], [1, 2, 0])
+    XT = np.stack(np.meshgrid(x, t, indexing="ij"), axis=-1)
 
     weak_lib = WeakPDELibrary(
         library_functions=library_functions,